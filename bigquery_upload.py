@@ -1,13 +1,30 @@
 """Upload harbor results to BigQuery."""
 
+from __future__ import annotations
+
+import datetime
+import functools
+import glob
+import importlib.util
 import json
 import logging
+import os
 import sys
+import tempfile
 import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+# google.cloud.bigquery is imported where it is used; importing it costs
+# hundreds of ms that the usage and missing-file paths should not pay
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+    from google.protobuf import message
 
-from google.cloud import bigquery
-from google.cloud.exceptions import NotFound
+import ijson
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -22,19 +39,59 @@ DATASET_ID = "tb_results"
 TABLE_ID = "tb_results_table"
 DATASET_LOCATION = "US"
 
-# BigQuery table schema
-SCHEMA = (
-    bigquery.SchemaField("id", "STRING", mode="NULLABLE"),
-    bigquery.SchemaField("started_at", "TIMESTAMP", mode="NULLABLE"),
-    bigquery.SchemaField("finished_at", "TIMESTAMP", mode="NULLABLE"),
-    bigquery.SchemaField("n_total_trials", "INTEGER", mode="NULLABLE"),
-    bigquery.SchemaField("stats", "STRING", mode="NULLABLE"),
-    bigquery.SchemaField("task_dir_name", "STRING", mode="NULLABLE"),
-)
+# Rows per insert_rows_json request (BigQuery recommends ~500 for streaming)
+INSERT_BATCH_SIZE = 500
+
+# Upper bound on concurrent uploads for upload_many
+MAX_UPLOAD_WORKERS = 32
+
+# Backoff for transient insert_rows_json failures (seconds)
+INSERT_RETRY_INITIAL_DELAY = 0.5
+INSERT_RETRY_MAX_DELAY = 8.0
+INSERT_RETRY_DEADLINE = 60.0
+
+# Row count at which a load job is used instead of streaming inserts
+LOAD_JOB_THRESHOLD = 1000
+
+# Set to 1/true to use load jobs for every upload (free, but limited to 1500 per table per day)
+ENV_USE_LOAD_JOB = "BQ_USE_LOAD_JOB"
+
+# Set to 1/true to stream through the Storage Write API (gRPC + protobuf) instead of insertAll
+ENV_USE_STORAGE_WRITE = "BQ_USE_STORAGE_WRITE"
+
+# result.json keys copied as-is vs. serialized to a JSON string
+_SCALAR_FIELDS = ("id", "started_at", "finished_at", "n_total_trials")
+_JSON_FIELDS = ("stats",)
+
+# result.json size (bytes) above which only the schema fields are stream-parsed
+STREAM_PARSE_THRESHOLD = 1_000_000
+
+
+def _env_flag(name: str) -> bool:
+    """Return True if environment variable name is set to 1/true/yes (case-insensitive)."""
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=1)
+def _schema() -> tuple[bigquery.SchemaField, ...]:
+    """Return the BigQuery table schema."""
+    from google.cloud import bigquery
+
+    return (
+        bigquery.SchemaField("id", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("started_at", "TIMESTAMP", mode="NULLABLE"),
+        bigquery.SchemaField("finished_at", "TIMESTAMP", mode="NULLABLE"),
+        bigquery.SchemaField("n_total_trials", "INTEGER", mode="NULLABLE"),
+        bigquery.SchemaField("stats", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("task_dir_name", "STRING", mode="NULLABLE"),
+    )
 
 
 def ensure_dataset_exists(client: bigquery.Client, dataset_id: str) -> bigquery.DatasetReference:
     """Ensure dataset exists, create if not found."""
+    from google.cloud import bigquery
+    from google.cloud.exceptions import NotFound
+
     dataset_ref = client.dataset(dataset_id)
     try:
         client.get_dataset(dataset_ref)
@@ -50,14 +107,22 @@ def ensure_dataset_exists(client: bigquery.Client, dataset_id: str) -> bigquery.
 
 def ensure_table_exists(client: bigquery.Client, dataset_ref: bigquery.DatasetReference, table_id: str) -> bigquery.TableReference:
     """Ensure table exists, create if not found."""
+    from google.cloud import bigquery
+    from google.cloud.exceptions import Conflict, NotFound
+
     table_ref = dataset_ref.table(table_id)
     try:
         client.get_table(table_ref)
         logger.info("Table '%s' exists", table_id)
     except NotFound:
         logger.info("Creating table '%s'", table_id)
-        table = bigquery.Table(table_ref, schema=SCHEMA)
-        client.create_table(table)
+        table = bigquery.Table(table_ref, schema=_schema())
+        try:
+            client.create_table(table)
+        except Conflict:
+            # Another uploader created it between the probe and the create
+            logger.info("Table '%s' was created concurrently", table_id)
+            return table_ref
         logger.info("Created table '%s'", table_id)
         # Wait for table to become available (BigQuery eventual consistency)
         _wait_for_table(client, table_ref)
@@ -66,6 +131,8 @@ def ensure_table_exists(client: bigquery.Client, dataset_ref: bigquery.DatasetRe
 
 def _wait_for_table(client: bigquery.Client, table_ref: bigquery.TableReference, max_retries: int = 10, delay: float = 1.0) -> None:
     """Wait for a newly created table to become available."""
+    from google.cloud.exceptions import NotFound
+
     for attempt in range(max_retries):
         try:
             client.get_table(table_ref)
@@ -78,46 +145,223 @@ def _wait_for_table(client: bigquery.Client, table_ref: bigquery.TableReference,
     logger.warning("Table may not be fully available after %d attempts", max_retries)
 
 
+@functools.lru_cache(maxsize=1)
+def _get_client() -> bigquery.Client:
+    """Return a BigQuery client shared by all uploads in this process."""
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import bigquery
+    from requests.adapters import HTTPAdapter
+
+    credentials, project = google.auth.default(scopes=bigquery.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    # Let concurrent uploads reuse TCP/TLS sessions instead of queueing on the default pool of 10
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=MAX_UPLOAD_WORKERS))
+    # Mounted last so a client-certificate (mTLS) adapter, when configured, takes precedence
+    session.configure_mtls_channel()
+    return bigquery.Client(project=project, credentials=credentials, _http=session)
+
+
+@functools.lru_cache
+def _ensure_table(dataset_id: str, table_id: str) -> bigquery.TableReference:
+    """Ensure dataset and table exist, once per (dataset, table) per process."""
+    client = _get_client()
+    dataset_ref = ensure_dataset_exists(client, dataset_id)
+    return ensure_table_exists(client, dataset_ref, table_id)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serialize obj to compact JSON bytes; NaN and Infinity become null."""
+    return orjson.dumps(obj)
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes with orjson, falling back to json for NaN/Infinity literals."""
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # harbor writes result.json with stdlib json, which emits NaN/Infinity; orjson rejects them
+        return json.loads(data)
+
+
 def flatten_result_data(result_data: dict, task_dir: Path) -> dict:
     """Flatten nested JSON structure for BigQuery insertion."""
-    stats = result_data.get("stats")
-    return {
-        "id": result_data.get("id"),
-        "started_at": result_data.get("started_at"),
-        "finished_at": result_data.get("finished_at"),
-        "n_total_trials": result_data.get("n_total_trials"),
-        "stats": json.dumps(stats) if stats else None,
-        "task_dir_name": task_dir.name,
+    row = {key: result_data.get(key) for key in _SCALAR_FIELDS}
+    for key in _JSON_FIELDS:
+        value = result_data.get(key)
+        row[key] = _json_dumps(value).decode() if value else None
+    row["task_dir_name"] = task_dir.name
+    return row
+
+
+def _storage_write_available() -> bool:
+    """Return True if the BigQuery Storage Write API client is installed."""
+    try:
+        return importlib.util.find_spec("google.cloud.bigquery_storage_v1") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _row_message_class() -> type[message.Message]:
+    """Build a proto2 message class mirroring the table schema."""
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+    field_types = {
+        "STRING": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+        "INTEGER": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+        # TIMESTAMP is sent as microseconds since the epoch
+        "TIMESTAMP": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
     }
 
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name="blaze4harbor_result_row.proto",
+        package="blaze4harbor",
+        syntax="proto2",
+    )
+    message_proto = file_proto.message_type.add(name="ResultRow")
+    for number, field in enumerate(_schema(), start=1):
+        message_proto.field.add(
+            name=field.name,
+            number=number,
+            type=field_types[field.field_type],
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+        )
 
-def upload_result_to_bigquery(
-    result_data: dict,
-    task_dir: Path,
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("blaze4harbor.ResultRow"))
+
+
+def _timestamp_micros(value: str | int | float) -> int:
+    """Convert a BigQuery-style timestamp to microseconds since the epoch (naive means UTC).
+
+    Accepts ISO 8601 strings, a trailing " UTC" as BigQuery prints it, and
+    numeric seconds since the epoch. Raises ValueError for anything else.
+    """
+    if isinstance(value, (int, float)):
+        return round(value * 1_000_000)
+    text = value.strip()
+    if text.endswith(" UTC"):
+        text = text[:-len(" UTC")]
+    timestamp = datetime.datetime.fromisoformat(text)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return round(timestamp.timestamp() * 1_000_000)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_write_client() -> Any:
+    """Return a Storage Write API client shared by all uploads in this process."""
+    from google.cloud import bigquery_storage_v1
+
+    return bigquery_storage_v1.BigQueryWriteClient()
+
+
+def _append_rows(project: str, table_ref: bigquery.TableReference, rows: list[dict], batch_size: int) -> list:
+    """Append rows to the table's default stream with the Storage Write API. Returns row errors.
+
+    Rows that cannot be serialized are reported as errors (index into rows)
+    and skipped; the rest are still appended.
+    """
+    from google.cloud.bigquery_storage_v1 import types
+    from google.protobuf import descriptor_pb2
+
+    message_class = _row_message_class()
+    timestamp_fields = {f.name for f in _schema() if f.field_type == "TIMESTAMP"}
+
+    proto_descriptor = descriptor_pb2.DescriptorProto()
+    message_class.DESCRIPTOR.CopyToProto(proto_descriptor)
+    writer_schema = types.ProtoSchema(proto_descriptor=proto_descriptor)
+
+    def serialize(row: dict) -> bytes:
+        message = message_class()
+        for key, value in row.items():
+            if value is None:
+                continue
+            setattr(message, key, _timestamp_micros(value) if key in timestamp_fields else value)
+        return message.SerializeToString()
+
+    errors = []
+    serialized_rows = []
+    for index, row in enumerate(rows):
+        try:
+            serialized_rows.append(serialize(row))
+        except (TypeError, ValueError) as e:
+            errors.append({"index": index, "message": f"Cannot serialize row: {e}"})
+    if not serialized_rows:
+        return errors
+
+    write_client = _get_write_client()
+    parent = write_client.table_path(project, table_ref.dataset_id, table_ref.table_id)
+    stream_name = f"{parent}/streams/_default"
+
+    requests = (
+        types.AppendRowsRequest(
+            write_stream=stream_name,
+            proto_rows=types.AppendRowsRequest.ProtoData(
+                writer_schema=writer_schema,
+                rows=types.ProtoRows(serialized_rows=serialized_rows[i:i + batch_size]),
+            ),
+        )
+        for i in range(0, len(serialized_rows), batch_size)
+    )
+    responses = write_client.append_rows(
+        requests,
+        metadata=(("x-goog-request-params", f"write_stream={stream_name}"),),
+    )
+
+    for response in responses:
+        errors.extend({"index": e.index, "message": e.message} for e in response.row_errors)
+        if response.error.code:
+            errors.append({"message": response.error.message})
+    return errors
+
+
+def insert_rows_to_bigquery(
+    rows: list[dict],
     dataset_id: str = DATASET_ID,
     table_id: str = TABLE_ID,
+    batch_size: int = INSERT_BATCH_SIZE,
+    use_storage_write: bool = False,
 ) -> bool:
-    """Upload result data to BigQuery. Returns True on success."""
-    logger.info("Uploading to BigQuery '%s.%s' from '%s'", dataset_id, table_id, task_dir)
+    """Upload already-flattened rows to BigQuery in batches. Returns True on success.
+
+    With use_storage_write, rows are appended through the Storage Write API
+    (gRPC + protobuf) when google-cloud-bigquery-storage is installed.
+    """
+    logger.info("Uploading %d rows to BigQuery '%s.%s'", len(rows), dataset_id, table_id)
+
+    if use_storage_write and not _storage_write_available():
+        logger.warning("google-cloud-bigquery-storage is not installed, using streaming inserts")
+        use_storage_write = False
 
     try:
-        client = bigquery.Client()
-        dataset_ref = ensure_dataset_exists(client, dataset_id)
-        table_ref = ensure_table_exists(client, dataset_ref, table_id)
+        client = _get_client()
+        table_ref = _ensure_table(dataset_id, table_id)
 
-        row = flatten_result_data(result_data, task_dir)
-        errors = client.insert_rows_json(table_ref, [row])
+        if use_storage_write:
+            errors = _append_rows(client.project, table_ref, rows, batch_size)
+        else:
+            from google.cloud import bigquery
+
+            retry = bigquery.DEFAULT_RETRY.with_delay(
+                initial=INSERT_RETRY_INITIAL_DELAY, maximum=INSERT_RETRY_MAX_DELAY
+            ).with_timeout(INSERT_RETRY_DEADLINE)
+            errors = []
+            for i in range(0, len(rows), batch_size):
+                errors.extend(client.insert_rows_json(table_ref, rows[i:i + batch_size], retry=retry))
 
         if errors:
             logger.error(
-                "Failed to insert row to BigQuery.\n"
+                "Failed to insert rows to BigQuery.\n"
                 "  Table: %s.%s\n"
                 "  Errors: %s",
                 dataset_id, table_id, errors
             )
             return False
 
-        logger.info("Successfully uploaded to %s.%s", dataset_id, table_id)
+        logger.info("Successfully uploaded %d rows to %s.%s", len(rows), dataset_id, table_id)
         return True
 
     except Exception as e:
@@ -130,13 +374,130 @@ def upload_result_to_bigquery(
         return False
 
 
+def upload_results_to_bigquery(
+    results: Iterable[tuple[dict, Path]],
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+    batch_size: int = INSERT_BATCH_SIZE,
+    use_storage_write: bool = False,
+) -> bool:
+    """Upload (result_data, task_dir) pairs to BigQuery in batches. Returns True on success."""
+    rows = [flatten_result_data(result_data, task_dir) for result_data, task_dir in results]
+    return upload_rows_to_bigquery(rows, dataset_id, table_id, batch_size, use_storage_write)
+
+
+def load_rows_to_bigquery(
+    rows: Iterable[dict],
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+) -> bool:
+    """Upload already-flattened rows to BigQuery with a load job. Returns True on success."""
+    logger.info("Loading rows to BigQuery '%s.%s' with a load job", dataset_id, table_id)
+
+    try:
+        from google.cloud import bigquery
+
+        client = _get_client()
+        table_ref = _ensure_table(dataset_id, table_id)
+
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            schema=_schema(),
+        )
+
+        # Stage rows as newline-delimited JSON so large batches never sit in memory
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as f:
+            for row in rows:
+                f.write(_json_dumps(row) + b"\n")
+            f.seek(0)
+            job = client.load_table_from_file(f, table_ref, job_config=job_config)
+            job.result()
+
+        logger.info("Successfully loaded %d rows to %s.%s", job.output_rows, dataset_id, table_id)
+        return True
+
+    except Exception as e:
+        logger.error(
+            "Failed to load to BigQuery.\n"
+            "  Table: %s.%s\n"
+            "  Error: %s",
+            dataset_id, table_id, e
+        )
+        return False
+
+
+def upload_rows_to_bigquery(
+    rows: list[dict],
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+    batch_size: int = INSERT_BATCH_SIZE,
+    use_storage_write: bool = False,
+) -> bool:
+    """Upload already-flattened rows, choosing a load job or streaming inserts. Returns True on success.
+
+    At LOAD_JOB_THRESHOLD rows and above (or always, with BQ_USE_LOAD_JOB set)
+    a single load job is used; it has no streaming quota or per-row cost.
+    Smaller uploads (and the Storage Write API path, also enabled by
+    BQ_USE_STORAGE_WRITE) stream in batch_size requests.
+    """
+    use_load_job = _env_flag(ENV_USE_LOAD_JOB)
+    use_storage_write = use_storage_write or _env_flag(ENV_USE_STORAGE_WRITE)
+    if (use_load_job or len(rows) >= LOAD_JOB_THRESHOLD) and not use_storage_write:
+        return load_rows_to_bigquery(rows, dataset_id, table_id)
+    return insert_rows_to_bigquery(rows, dataset_id, table_id, batch_size, use_storage_write)
+
+
+def load_results_to_bigquery(
+    results: Iterable[tuple[dict, Path]],
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+) -> bool:
+    """Upload (result_data, task_dir) pairs to BigQuery with a load job. Returns True on success."""
+    rows = (flatten_result_data(result_data, task_dir) for result_data, task_dir in results)
+    return load_rows_to_bigquery(rows, dataset_id, table_id)
+
+
+def upload_result_to_bigquery(
+    result_data: dict,
+    task_dir: Path,
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+    row: dict | None = None,
+) -> bool:
+    """Upload result data to BigQuery. Returns True on success.
+
+    Pass row to skip flattening when the caller already has the BigQuery row.
+    """
+    logger.info("Uploading to BigQuery '%s.%s' from '%s'", dataset_id, table_id, task_dir)
+    if row is None:
+        row = flatten_result_data(result_data, task_dir)
+    return upload_rows_to_bigquery([row], dataset_id, table_id)
+
+
+def stream_result_json(result_json_path: Path) -> dict:
+    """Stream-parse result.json, keeping only the top-level keys in the schema."""
+    wanted = set(_SCALAR_FIELDS + _JSON_FIELDS)
+    with open(result_json_path, "rb") as f:
+        return {
+            key: value
+            for key, value in ijson.kvitems(f, "", use_float=True)
+            if key in wanted
+        }
+
+
 def load_result_json(task_dir: Path) -> dict | None:
     """Load result.json from task directory. Returns None on error."""
     result_json_path = task_dir / "result.json"
 
     try:
-        with open(result_json_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        if result_json_path.stat().st_size > STREAM_PARSE_THRESHOLD:
+            try:
+                return stream_result_json(result_json_path)
+            except ijson.JSONError:
+                # ijson rejects NaN/Infinity; the full parser below accepts them
+                logger.info("Stream parsing failed, loading full result.json: %s", result_json_path)
+        return _json_loads(result_json_path.read_bytes())
     except FileNotFoundError:
         logger.error(
             "result.json not found.\n"
@@ -145,7 +506,7 @@ def load_result_json(task_dir: Path) -> dict | None:
             result_json_path
         )
         return None
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         logger.error(
             "Failed to parse result.json.\n"
             "  Path: %s\n"
@@ -153,26 +514,97 @@ def load_result_json(task_dir: Path) -> dict | None:
             result_json_path, e
         )
         return None
+    except OSError as e:
+        logger.error(
+            "Failed to read result.json.\n"
+            "  Path: %s\n"
+            "  Error: %s",
+            result_json_path, e
+        )
+        return None
+
+
+def _load_row(task_dir: Path) -> dict | None:
+    """Load result.json from task_dir and flatten it to a BigQuery row. Returns None on error."""
+    result_data = load_result_json(task_dir)
+    if result_data is None:
+        return None
+    return flatten_result_data(result_data, task_dir)
+
+
+def load_many_rows(task_dirs: list[Path], max_workers: int | None = None) -> list[dict]:
+    """Load and flatten result.json from many task directories concurrently, skipping ones that fail.
+
+    Each worker flattens its own result, so only the BigQuery rows are kept
+    in memory rather than every parsed result.json.
+    """
+    max_workers = max_workers or max(1, min(MAX_UPLOAD_WORKERS, len(task_dirs)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [row for row in executor.map(_load_row, task_dirs) if row is not None]
+
+
+def upload_many(
+    task_dirs: list[Path],
+    dataset_id: str = DATASET_ID,
+    table_id: str = TABLE_ID,
+    max_workers: int | None = None,
+) -> bool:
+    """Upload many task directories in one batch. Returns True if all succeed.
+
+    result.json files are read concurrently; the rows then go out as a load
+    job or INSERT_BATCH_SIZE streaming requests rather than one request per
+    directory.
+    """
+    if not task_dirs:
+        logger.warning("No task directories to upload")
+        return False
+
+    rows = load_many_rows(task_dirs, max_workers)
+    failed_count = len(task_dirs) - len(rows)
+
+    if rows and not upload_rows_to_bigquery(rows, dataset_id, table_id):
+        return False
+
+    if failed_count:
+        logger.error("Failed to load %d of %d task directories", failed_count, len(task_dirs))
+        return False
+
+    logger.info("Successfully uploaded %d task directories", len(task_dirs))
+    return True
 
 
 def main(argv: list[str]) -> int:
     """CLI entry point. Returns exit code."""
     print("\n=== BigQuery Upload ===\n")
 
+    parallel = len(argv) > 1 and argv[1] == "--parallel"
+    if parallel:
+        argv = argv[:1] + argv[2:]
+
     if len(argv) < 2:
         logger.error(
             "Missing required argument: task_dir\n"
-            "  Usage: bigquery_upload.py <task_dir> [dataset_id] [table_id]\n"
+            "  Usage: bigquery_upload.py [--parallel] <task_dir> [dataset_id] [table_id]\n"
+            "  With --parallel, task_dir is a glob pattern matching task directories\n"
             "  Default dataset: %s\n"
             "  Default table: %s",
             DATASET_ID, TABLE_ID
         )
         return 1
 
-    task_dir = Path(argv[1])
     dataset_id = argv[2] if len(argv) > 2 else DATASET_ID
     table_id = argv[3] if len(argv) > 3 else TABLE_ID
 
+    if parallel:
+        task_dirs = sorted(Path(p) for p in glob.glob(argv[1]) if Path(p).is_dir())
+        logger.info("Task directories: %d matching '%s'", len(task_dirs), argv[1])
+        logger.info("Target table: %s.%s", dataset_id, table_id)
+
+        success = upload_many(task_dirs, dataset_id, table_id)
+        return 0 if success else 1
+
+    task_dir = Path(argv[1])
+
     logger.info("Task directory: %s", task_dir)
     logger.info("Target table: %s.%s", dataset_id, table_id)
 
@@ -180,7 +612,7 @@ def main(argv: list[str]) -> int:
     if result_data is None:
         return 1
 
-    success = upload_result_to_bigquery(result_data, task_dir, dataset_id, table_id)
+    success = upload_results_to_bigquery([(result_data, task_dir)], dataset_id, table_id)
     return 0 if success else 1
 
 
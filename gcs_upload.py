@@ -1,10 +1,22 @@
 """Upload task directory to Google Cloud Storage."""
 
+import functools
+import gzip
+import io
 import logging
+import mimetypes
+import os
 import sys
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import google.auth
+from google.api_core import exceptions
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from requests.adapters import HTTPAdapter
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +28,132 @@ logger = logging.getLogger(__name__)
 # TODO: Read from environment variables
 BUCKET_NAME = "tb-results"
 
+# Number of parallel upload processes (override with GCS_UPLOAD_WORKERS)
+ENV_UPLOAD_WORKERS = "GCS_UPLOAD_WORKERS"
+DEFAULT_UPLOAD_WORKERS = 32
+
+# Connections kept per host by the shared client; THREAD uploads are capped at this
+HTTP_POOL_SIZE = DEFAULT_UPLOAD_WORKERS
+
+# Set to 1/true to keep objects that already exist instead of overwriting them
+ENV_SKIP_IF_EXISTS = "GCS_SKIP_IF_EXISTS"
+
+# Client-side integrity check; crc32c uses the google-crc32c C extension
+UPLOAD_CHECKSUM = "crc32c"
+
+# Chunk size for resumable uploads (files over 8 MiB); throughput plateaus around 10-15 MiB.
+# Smaller files are always sent in a single multipart request.
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Files over CONCURRENT_UPLOAD_THRESHOLD bytes are sent as parts in parallel (XML multipart upload)
+CONCURRENT_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+CONCURRENT_UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+CONCURRENT_UPLOAD_WORKERS = 8
+
+# Set to 1/true to pack files under PACK_THRESHOLD bytes into a single BUNDLE_NAME tarball
+ENV_PACK_SMALL_FILES = "GCS_PACK_SMALL_FILES"
+PACK_THRESHOLD = 1024 * 1024
+BUNDLE_NAME = "_bundle.tar.gz"
+
+# Set to 1/true to gzip text files on upload (stored with Content-Encoding: gzip, served decompressed)
+ENV_GZIP_TEXT_FILES = "GCS_GZIP_TEXT_FILES"
+GZIP_SUFFIXES = (".json", ".log", ".txt", ".csv")
+
+
+def _env_flag(name: str) -> bool:
+    """Return True if environment variable name is set to 1/true/yes (case-insensitive)."""
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> storage.Client:
+    """Return a GCS client shared by all uploads in this process."""
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    # THREAD uploads share this session; size its pool for them instead of the default 10
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE))
+    # Mounted last so a client-certificate (mTLS) adapter, when configured, takes precedence
+    session.configure_mtls_channel()
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+
+def _walk_files(root: str) -> list[tuple[str, int]]:
+    """List files under root as (relative POSIX path, size) pairs, using cached dirent types."""
+    files = []
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    relpath = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    files.append((relpath, entry.stat().st_size))
+    return files
+
+
+def _upload_bundle(
+    bucket: storage.Bucket, task_dir: Path, filenames: list[str], blob_name: str, skip_if_exists: bool
+) -> Exception | None:
+    """Pack files into one gzipped tarball and upload it as blob_name. Returns the error, if any."""
+    try:
+        buffer = io.BytesIO()
+        # Fastest zlib level: the point is fewer round trips, not the smallest archive
+        with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=1) as tar:
+            for filename in filenames:
+                tar.add(task_dir / filename, arcname=filename)
+        bucket.blob(blob_name).upload_from_file(
+            buffer,
+            rewind=True,
+            content_type="application/gzip",
+            checksum=UPLOAD_CHECKSUM,
+            if_generation_match=0 if skip_if_exists else None,
+        )
+    except Exception as e:
+        return e
+    return None
+
+
+def _upload_large_file(
+    bucket: storage.Bucket, task_dir: Path, filename: str, blob_name: str, skip_if_exists: bool
+) -> Exception | None:
+    """Upload one large file as concurrently sent parts. Returns the error, if any."""
+    blob = bucket.blob(blob_name)
+    try:
+        # Multipart uploads take no generation precondition; one metadata GET is cheap next to the file
+        if skip_if_exists and blob.exists():
+            return exceptions.PreconditionFailed(f"{blob_name} already exists")
+        transfer_manager.upload_chunks_concurrently(
+            str(task_dir / filename),
+            blob,
+            chunk_size=CONCURRENT_UPLOAD_CHUNK_SIZE,
+            max_workers=CONCURRENT_UPLOAD_WORKERS,
+            checksum=UPLOAD_CHECKSUM,
+        )
+    except Exception as e:
+        return e
+    return None
+
+
+def _upload_gzipped_file(
+    bucket: storage.Bucket, task_dir: Path, filename: str, blob_name: str, skip_if_exists: bool
+) -> Exception | None:
+    """Gzip one file in memory and upload it with Content-Encoding: gzip. Returns the error, if any."""
+    blob = bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+    blob.content_encoding = "gzip"
+    blob.content_type = mimetypes.guess_type(filename)[0] or "text/plain"
+    try:
+        # Fastest zlib level: uploader CPU is what this saves, higher levels invert the tradeoff
+        data = gzip.compress((task_dir / filename).read_bytes(), compresslevel=1)
+        blob.upload_from_file(
+            io.BytesIO(data),
+            checksum=UPLOAD_CHECKSUM,
+            if_generation_match=0 if skip_if_exists else None,
+        )
+    except Exception as e:
+        return e
+    return None
+
 
 def upload_task_dir_to_gcs(task_dir: Path, bucket_name: str = BUCKET_NAME) -> bool:
     """Upload task directory to GCS. Returns True on success."""
@@ -31,40 +169,91 @@ def upload_task_dir_to_gcs(task_dir: Path, bucket_name: str = BUCKET_NAME) -> bo
         return False
 
     try:
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
+        files = _walk_files(str(task_dir))
+        if not files:
+            logger.warning("No files found in task directory")
+            return False
 
-        uploaded_count = 0
-        error_count = 0
+        bucket = _get_client().bucket(bucket_name)
+        # if_generation_match=0 makes the upload itself fail fast on existing objects, no metadata GET
+        skip_if_exists = _env_flag(ENV_SKIP_IF_EXISTS)
 
-        for path in task_dir.rglob("*"):
-            if not path.is_file():
-                continue
+        # Small files cost a round trip each; optionally send them as one tarball instead
+        bundled = []
+        if _env_flag(ENV_PACK_SMALL_FILES):
+            bundled = [f for f, size in files if size < PACK_THRESHOLD]
+            if len(bundled) < 2:
+                bundled = []
+            else:
+                files = [(f, size) for f, size in files if size >= PACK_THRESHOLD]
 
-            relative_path = path.relative_to(task_dir).as_posix()
-            blob_name = f"{task_dir.name}/{relative_path}"
+        # Single-stream throughput caps out on large files; split them into parallel parts
+        large = [f for f, size in files if size > CONCURRENT_UPLOAD_THRESHOLD]
+        filenames = [f for f, size in files if size <= CONCURRENT_UPLOAD_THRESHOLD]
 
-            try:
-                blob = bucket.blob(blob_name)
-                blob.upload_from_filename(str(path))
-                uploaded_count += 1
-                logger.info("Uploaded %s", blob_name)
-            except Exception as e:
+        gzipped = []
+        if _env_flag(ENV_GZIP_TEXT_FILES):
+            gzipped = [f for f in filenames if f.endswith(GZIP_SUFFIXES)]
+            gzipped_set = set(gzipped)
+            filenames = [f for f in filenames if f not in gzipped_set]
+
+        # Transfer manager uploads from a process pool with per-process clients
+        max_workers = int(os.environ.get(ENV_UPLOAD_WORKERS, DEFAULT_UPLOAD_WORKERS))
+        uploads: list[tuple[str, Exception | None]] = []
+        if filenames:
+            results = transfer_manager.upload_many_from_filenames(
+                bucket,
+                filenames,
+                source_directory=str(task_dir),
+                blob_name_prefix=f"{task_dir.name}/",
+                skip_if_exists=skip_if_exists,
+                upload_kwargs={"checksum": UPLOAD_CHECKSUM},
+                blob_constructor_kwargs={"chunk_size": UPLOAD_CHUNK_SIZE},
+                max_workers=min(max_workers, len(filenames)),
+                worker_type=transfer_manager.PROCESS,
+            )
+            uploads.extend(zip(filenames, results))
+        if gzipped:
+            # In-memory buffers cannot be pickled to PROCESS workers; compress in each thread so
+            # at most max_workers files are held in memory at once
+            with ThreadPoolExecutor(max_workers=min(max_workers, HTTP_POOL_SIZE, len(gzipped))) as executor:
+                results = executor.map(
+                    lambda f: _upload_gzipped_file(bucket, task_dir, f, f"{task_dir.name}/{f}", skip_if_exists),
+                    gzipped,
+                )
+                uploads.extend(zip(gzipped, results))
+        for filename in large:
+            blob_name = f"{task_dir.name}/{filename}"
+            uploads.append((filename, _upload_large_file(bucket, task_dir, filename, blob_name, skip_if_exists)))
+        if bundled:
+            logger.info("Packing %d small files into %s", len(bundled), BUNDLE_NAME)
+            blob_name = f"{task_dir.name}/{BUNDLE_NAME}"
+            uploads.append((BUNDLE_NAME, _upload_bundle(bucket, task_dir, bundled, blob_name, skip_if_exists)))
+
+        uploaded_count = 0
+        skipped_count = 0
+        error_count = 0
+
+        for filename, result in uploads:
+            blob_name = f"{task_dir.name}/{filename}"
+            if skip_if_exists and isinstance(result, exceptions.PreconditionFailed):
+                skipped_count += 1
+                logger.info("Skipped %s (already exists)", blob_name)
+            elif isinstance(result, Exception):
                 error_count += 1
                 logger.error(
                     "Failed to upload file.\n"
                     "  File: %s\n"
                     "  Error: %r",
-                    blob_name, e
+                    blob_name, result
                 )
-
-        if uploaded_count == 0:
-            logger.warning("No files found in task directory")
-            return False
+            else:
+                uploaded_count += 1
+                logger.info("Uploaded %s", blob_name)
 
         logger.info(
-            "Successfully uploaded %d files to gs://%s/%s/",
-            uploaded_count, bucket_name, task_dir.name
+            "Successfully uploaded %d files to gs://%s/%s/ (%d skipped)",
+            uploaded_count, bucket_name, task_dir.name, skipped_count
         )
         return error_count == 0
 
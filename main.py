@@ -1,14 +1,18 @@
 """Blaze4Harbor: A wrapper CLI to run harbor and upload results."""
 
-import json
+import functools
+import importlib.util
 import logging
 import os
 import re
-import shlex
 import subprocess
 import sys
-import tempfile
+from collections.abc import Callable
 from pathlib import Path
+from types import ModuleType
+
+# concurrent.futures is imported where it is used; it is only needed once
+# harbor has produced results, not for --help or a failed run
 
 # Environment variable names
 ENV_HARBOR_PATH = "HARBOR_PATH"
@@ -17,6 +21,12 @@ ENV_LOCAL_PROJECT_DIR = "BLAZE4HARBOR_LOCAL_PROJECT_DIR"
 # Required upload scripts
 UPLOAD_SCRIPTS = ("bigquery_upload.py", "gcs_upload.py")
 
+# Packages an upload script needs to be imported in-process instead of run via subprocess
+UPLOAD_SCRIPT_REQUIREMENTS = {
+    "bigquery_upload.py": ("google.auth", "google.cloud.bigquery", "ijson", "orjson", "requests"),
+    "gcs_upload.py": ("google.cloud.storage",),
+}
+
 # Harbor command control settings
 # - Auto add output arg: auto-add -o flag for commands that need output directory
 # - Post-process: upload results to BigQuery and GCS after harbor execution
@@ -28,6 +38,15 @@ CMD_NEED_POST_PROCESS = ("run", ("jobs", "start"), ("jobs", "resume"))
 # Default output directory name
 DEFAULT_OUTPUT_DIR = "jobs"
 
+# Harbor output line that carries the results directory, and the pattern extracting it
+RESULTS_LINE_MARKER = "Results written to"
+RESULTS_LINE_MARKER_BYTES = RESULTS_LINE_MARKER.encode()
+RESULTS_DIR_PATTERN = re.compile(r"Results written to[ \t]+([^\r\n]+?)/result\.json")
+
+# Line endings harbor's output is split on while scanning, and the longest partial line kept
+RESULTS_LINE_BREAK = re.compile(rb"[\r\n]")
+RESULTS_LINE_MAX_BYTES = 8192
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -90,21 +109,24 @@ def get_scripts_dir() -> Path:
             f"  export {ENV_LOCAL_PROJECT_DIR}=/path/to/blaze4harbor"
         )
 
-    project_path = Path(project_dir)
-    if not project_path.exists():
+    # One directory read instead of a stat per script
+    try:
+        with os.scandir(project_dir) as entries:
+            names = {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
         raise FileNotFoundError(
             f"Project directory not found at: {project_dir}\n"
             f"Please verify the {ENV_LOCAL_PROJECT_DIR} environment variable is set correctly."
-        )
+        ) from None
 
     for script in UPLOAD_SCRIPTS:
-        if not (project_path / script).exists():
+        if script not in names:
             raise FileNotFoundError(
                 f"Required script '{script}' not found in {project_dir}\n"
                 f"Please ensure the script exists in the project directory."
             )
 
-    return project_path
+    return Path(project_dir)
 
 
 def get_default_output_dir() -> Path:
@@ -153,35 +175,151 @@ def ensure_output_arg(args: list[str]) -> list[str]:
     return args + ["-o", str(default_output)]
 
 
-def run_harbor(harbor_cmd: str, harbor_args: list[str], log_path: str) -> None:
-    """Run harbor command with platform-specific script wrapper."""
-    if sys.platform.startswith("darwin"):
-        script_cmd = ["script", "-q", log_path, harbor_cmd] + harbor_args
-    elif sys.platform.startswith("linux"):
-        cmd_str = " ".join(shlex.quote(a) for a in [harbor_cmd] + harbor_args)
-        script_cmd = ["script", "-q", log_path, "-c", cmd_str]
-    elif sys.platform.startswith("win"):
-        script_cmd = [harbor_cmd] + harbor_args
-    else:
-        raise RuntimeError(f"Unsupported platform: {sys.platform}")
+def _read_window_size(fd: int) -> bytes | None:
+    """Return the packed TIOCGWINSZ window size of a terminal fd, or None if it is not a terminal."""
+    import fcntl
+    import termios
+
+    try:
+        return fcntl.ioctl(fd, termios.TIOCGWINSZ, b"\0" * 8)
+    except OSError:
+        return None
+
+
+def _write_window_size(fd: int, size: bytes) -> None:
+    """Apply a packed window size to a terminal fd."""
+    import fcntl
+    import termios
+
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, size)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data to fd."""
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def _run_harbor_pty(cmd: list[str]) -> str | None:
+    """Run cmd on a pseudo-terminal so harbor keeps its interactive output.
+
+    Like script(1), the caller's window size is copied to the child and kept
+    in sync on SIGWINCH, and stdin is relayed in raw mode.
+    """
+    import pty  # POSIX only
+    import select
+    import signal
+    import termios
+    import tty
+
+    stdin_fd = sys.stdin.fileno()
+    stdout_fd = sys.stdout.fileno()
+    window_size = _read_window_size(stdout_fd)
+
+    pid, master_fd = pty.fork()
+    if pid == 0:
+        try:
+            if window_size is not None:
+                _write_window_size(sys.stdout.fileno(), window_size)
+            os.execvp(cmd[0], cmd)
+        except OSError as e:
+            os.write(2, f"Failed to run {cmd[0]}: {e}\n".encode())
+        os._exit(127)
+
+    def on_resize(signum: int, frame: object) -> None:
+        size = _read_window_size(stdout_fd)
+        if size is not None:
+            _write_window_size(master_fd, size)
+
+    results_line = None
+    pending = b""
+    stdin_mode = None
+    previous_handler = signal.signal(signal.SIGWINCH, on_resize)
+    try:
+        if os.isatty(stdin_fd):
+            stdin_mode = termios.tcgetattr(stdin_fd)
+            tty.setraw(stdin_fd)
+
+        read_fds = [master_fd, stdin_fd]
+        while True:
+            ready, _, _ = select.select(read_fds, [], [])
+            if master_fd in ready:
+                try:
+                    data = os.read(master_fd, 4096)
+                except OSError:
+                    # Linux reports EIO once the child side of the pty is closed
+                    data = b""
+                if not data:
+                    break
+                _write_all(stdout_fd, data)
+                if results_line is None:
+                    # Rich redraws progress with bare \r, so split on both line endings
+                    *lines, pending = RESULTS_LINE_BREAK.split(pending + data)
+                    for line in lines:
+                        if RESULTS_LINE_MARKER_BYTES in line:
+                            results_line = line.decode(errors="replace")
+                            break
+                    # A line without breaks can be arbitrarily long; keep only what could still match
+                    pending = pending[-RESULTS_LINE_MAX_BYTES:]
+            if stdin_fd in ready:
+                data = os.read(stdin_fd, 4096)
+                if data:
+                    _write_all(master_fd, data)
+                else:
+                    read_fds.remove(stdin_fd)
+    finally:
+        if stdin_mode is not None:
+            termios.tcsetattr(stdin_fd, termios.TCSAFLUSH, stdin_mode)
+        signal.signal(signal.SIGWINCH, previous_handler)
+        os.close(master_fd)
+
+    _, status = os.waitpid(pid, 0)
+
+    if results_line is None and RESULTS_LINE_MARKER_BYTES in pending:
+        results_line = pending.decode(errors="replace")
+
+    returncode = os.waitstatus_to_exitcode(status)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return results_line
+
+
+def _run_harbor_pipe(cmd: list[str]) -> str | None:
+    """Run cmd with its output piped through this process (no pty on Windows)."""
+    results_line = None
 
-    subprocess.run(script_cmd, text=True, check=True)
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1) as proc:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            if results_line is None and RESULTS_LINE_MARKER in line:
+                results_line = line
 
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return results_line
 
-def extract_results_line(log_path: str) -> str:
-    """Extract the 'Results written to' line from harbor log."""
-    with open(log_path, "r") as f:
-        for line in f:
-            if "Results written to" in line:
-                return line
 
-    raise ValueError("Could not extract results directory line from output")
+# Harbor runner for this platform, chosen once at import: a pty where available (POSIX), else a pipe
+_HARBOR_RUNNER: Callable[[list[str]], str | None] | None
+if sys.platform.startswith(("darwin", "linux")):
+    _HARBOR_RUNNER = _run_harbor_pty
+elif sys.platform.startswith("win"):
+    _HARBOR_RUNNER = _run_harbor_pipe
+else:
+    _HARBOR_RUNNER = None
+
+
+def run_harbor(harbor_cmd: str, harbor_args: list[str]) -> str | None:
+    """Run harbor, passing its output through, and return the 'Results written to' line."""
+    if _HARBOR_RUNNER is None:
+        raise RuntimeError(f"Unsupported platform: {sys.platform}")
+    return _HARBOR_RUNNER([harbor_cmd, *harbor_args])
 
 
 def extract_results_dir(output_text: str) -> str | None:
     """Extract the results directory path from harbor output line."""
-    pattern = r"Results written to\s+(.+?)/result\.json"
-    match = re.search(pattern, output_text)
+    match = RESULTS_DIR_PATTERN.search(output_text)
     return match.group(1) if match else None
 
 
@@ -194,45 +332,99 @@ def run_upload_script(script_path: Path, task_dir: Path) -> None:
     )
 
 
-def post_process_results(task_dir: Path, script_dir: Path) -> None:
-    """Upload harbor results to BigQuery and GCS."""
+def _module_available(name: str) -> bool:
+    """Check if a module can be imported without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+@functools.cache
+def load_upload_module(script_path: Path) -> ModuleType | None:
+    """Import an upload script in-process. Returns None if its dependencies are missing."""
+    requirements = UPLOAD_SCRIPT_REQUIREMENTS.get(script_path.name, ())
+    missing = [name for name in requirements if not _module_available(name)]
+    if missing:
+        logger.info("Running %s via subprocess (missing: %s)", script_path.name, ", ".join(missing))
+        return None
+
+    spec = importlib.util.spec_from_file_location(script_path.stem, script_path)
+    if spec is None or spec.loader is None:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    # Registered so objects defined in the module can be pickled to worker processes
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        del sys.modules[spec.name]
+        logger.info("Running %s via subprocess (%s)", script_path.name, e)
+        return None
+    return module
+
+
+def upload_to_bigquery(task_dir: Path, script_dir: Path) -> None:
+    """Upload result.json from task_dir to BigQuery."""
     result_json_path = task_dir / "result.json"
 
-    result_data = None
-    if result_json_path.exists():
-        with open(result_json_path, "r", encoding="utf-8") as f:
-            result_data = json.load(f)
-        logger.info("Loaded result.json from %s", result_json_path)
-    else:
+    if not result_json_path.exists():
         logger.warning("result.json not found at %s", result_json_path)
+        logger.info("Skipping BigQuery upload (no result data)")
+        return
 
-    # === Phase 2.2: Upload to BigQuery ===
-    print("\n=== Phase 2.2: Uploading to BigQuery ===\n")
-    if result_data is not None:
+    bigquery_upload = load_upload_module(script_dir / "bigquery_upload.py")
+    if bigquery_upload is None:
+        # The script parses result.json itself; reading it here too would parse it twice
         run_upload_script(script_dir / "bigquery_upload.py", task_dir)
+        return
+
+    # load_result_json logs and returns None for unreadable or malformed files
+    result_data = bigquery_upload.load_result_json(task_dir)
+    if result_data is not None:
+        logger.info("Loaded result.json from %s", result_json_path)
+        bigquery_upload.upload_result_to_bigquery(result_data, task_dir)
     else:
         logger.info("Skipping BigQuery upload (no result data)")
 
-    # === Phase 2.3: Upload to GCS ===
-    print("\n=== Phase 2.3: Uploading to GCS ===\n")
-    run_upload_script(script_dir / "gcs_upload.py", task_dir)
+
+def upload_to_gcs(task_dir: Path, script_dir: Path) -> None:
+    """Upload all files in task_dir to GCS."""
+    gcs_upload = load_upload_module(script_dir / "gcs_upload.py")
+    if gcs_upload is not None:
+        gcs_upload.upload_task_dir_to_gcs(task_dir)
+    else:
+        run_upload_script(script_dir / "gcs_upload.py", task_dir)
+
+
+def post_process_results(task_dir: Path, script_dir: Path) -> None:
+    """Upload harbor results to BigQuery and GCS concurrently."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    # === Phase 2.2: Upload to BigQuery and GCS ===
+    print("\n=== Phase 2.2: Uploading to BigQuery and GCS ===\n")
+
+    # The two uploads are independent and I/O-bound, so neither waits on the other
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(upload_to_bigquery, task_dir, script_dir),
+            executor.submit(upload_to_gcs, task_dir, script_dir),
+        ]
+    for future in futures:
+        future.result()
 
 
 def main(argv: list[str]) -> int:
     """Run harbor and post-process results. Returns exit code."""
     check_required_env_vars()
 
-    temp_file_path: str | None = None
     try:
         # === Phase 1: Running harbor ===
         print("\n=== Phase 1: Running harbor ===\n")
         harbor_cmd = get_harbor_executable()
         harbor_args = ensure_output_arg(argv[1:])
 
-        with tempfile.NamedTemporaryFile(mode="w+", delete=False, suffix=".log") as f:
-            temp_file_path = f.name
-
-        run_harbor(harbor_cmd, harbor_args, temp_file_path)
+        results_line = run_harbor(harbor_cmd, harbor_args)
 
         # Skip post-process if not required
         if not should_run_post_process(harbor_args):
@@ -240,7 +432,8 @@ def main(argv: list[str]) -> int:
 
         # === Phase 2.1: Extracting results directory ===
         print("\n=== Phase 2.1: Extracting results directory ===\n")
-        results_line = extract_results_line(temp_file_path)
+        if results_line is None:
+            raise ValueError("Could not extract results directory line from output")
         results_dir = extract_results_dir(results_line)
 
         if not results_dir:
@@ -249,7 +442,7 @@ def main(argv: list[str]) -> int:
 
         logger.info("Found results directory: %s", results_dir)
 
-        # Phase 2.2 & 2.3 are handled in post_process_results
+        # Phase 2.2 is handled in post_process_results
         post_process_results(Path(results_dir), get_scripts_dir())
         return 0
 
@@ -265,9 +458,6 @@ def main(argv: list[str]) -> int:
     except Exception as e:
         logger.error("Unexpected error: %s", e)
         return 1
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
 
 
 if __name__ == "__main__":